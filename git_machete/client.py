@@ -7,7 +7,7 @@ import shutil
 import sys
 from collections import OrderedDict
 from enum import Enum, auto
-from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from . import git_config_keys, utils
 from .annotation import Annotation
@@ -1628,8 +1628,9 @@ class MacheteClient:
 
     def __sync_annotations_to_branch_layout_file(self, prs: List[GitHubPullRequest], current_user: Optional[str],
                                                  include_urls: bool, verbose: bool) -> None:
+        managed_branches: Set[LocalBranchShortName] = set(self.managed_branches)
         for pr in prs:
-            if LocalBranchShortName.of(pr.head) in self.managed_branches:
+            if LocalBranchShortName.of(pr.head) in managed_branches:
                 debug(f'{pr} corresponds to a managed branch')
                 anno: str = self.__github_pr_annotation(pr, current_user, include_urls)
                 upstream: Optional[LocalBranchShortName] = self.__up_branch.get(LocalBranchShortName.of(pr.head))
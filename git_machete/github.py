@@ -1,19 +1,34 @@
-import http
-import json
 import os
 import re
-import shutil
-import urllib.error
-# Deliberately NOT using much more convenient `requests` to avoid external dependencies in production code
-import urllib.request
-from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from typing import (TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple,
+                    Optional, Tuple)
 
 from .exceptions import (MacheteException, UnexpectedMacheteException,
                          UnprocessableEntityHTTPError)
 from .git_operations import LocalBranchShortName
 from .utils import bold, compact_dict, debug, popen_cmd, warn
 
+if TYPE_CHECKING:
+    import urllib.request
+
+# Anchored to the line start (modulo leading whitespace and the `✓` mark) to avoid scanning each position of a multi-line output
+_TOKEN_RE = re.compile(r"^\W*Token: ([A-Za-z0-9_-]{20,})\s*$", re.MULTILINE)
+_HUB_OAUTH_TOKEN_PREFIX_RE = re.compile(' *oauth_token: +')
+_REPO_ID_RE = re.compile(r"/repositories/([0-9]+)/")
+_HOST_STRIP_RE = re.compile(r"https://[^/]+")
+
+
+def _get_next_page_path(link_header: str, url_prefix: str) -> Optional[str]:
+    # Link header looks like `<{url_prefix}/foo?page=2>; rel="next", <{url_prefix}/foo?page=5>; rel="last"`.
+    # Plain `str.find`s are sufficient here, no need to compile a regex per URL prefix.
+    rel_next_index = link_header.find('>; rel="next"')
+    if rel_next_index == -1:
+        return None
+    next_page_url = link_header[link_header.rfind('<', 0, rel_next_index) + 1:rel_next_index]
+    if not next_page_url.startswith(url_prefix + '/'):
+        return None
+    return next_page_url[len(url_prefix):]
+
 
 class GitHubPullRequest(NamedTuple):
     number: int
@@ -67,6 +82,35 @@ class OrganizationAndRepositoryAndRemote(NamedTuple):
 
 
 GITHUB_TOKEN_ENV_VAR = 'GITHUB_TOKEN'
+# Resolved once at import time, as home directory lookup involves env/passwd lookups.
+# Unlike `Path.home()`, `os.path.expanduser` doesn't raise when the home directory can't be determined,
+# which matters since this module is imported on each git-machete invocation.
+_GITHUB_TOKEN_FILE_PATH: str = os.path.expanduser('~/.github-token')
+_HUB_CONFIG_FILE_PATH: str = os.path.expanduser('~/.config/hub')
+
+# Resolving the token might involve spawning `gh` subprocesses, and multiple `GitHubClient`s can be created
+# within a single git-machete invocation. There is no need to invalidate this cache, as git-machete is a short-lived process.
+_token_for_domain_cached: Dict[str, Optional["GitHubToken"]] = {}
+# Parsed once, so that looking up tokens for multiple domains doesn't re-read the file each time
+_token_by_domain_from_file_cached: Optional[Dict[str, str]] = None
+
+
+def _build_access_token_index(lines: Iterable[str]) -> Dict[str, str]:
+    # ~/.github-token is a file with a structure similar to:
+    #
+    # ghp_mytoken_for_github_com
+    # ghp_myothertoken_for_git_example_org git.example.org
+    # ghp_yetanothertoken_for_git_example_com git.example.com
+    #
+    # If a domain is listed more than once, the first matching line wins.
+    token_by_domain: Dict[str, str] = {}
+    for line in lines:
+        line = line.rstrip()
+        if " " in line:
+            token_by_domain.setdefault(line[line.rindex(" ") + 1:], line[:line.index(" ")])
+        else:
+            token_by_domain.setdefault(GitHubClient.DEFAULT_GITHUB_DOMAIN, line)
+    return token_by_domain
 
 
 class GitHubToken(NamedTuple):
@@ -75,10 +119,18 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def for_domain(cls, domain: str) -> Optional["GitHubToken"]:
-        return (cls.__get_token_from_env() or
-                cls.__get_token_from_file_in_home_directory(domain) or
-                cls.__get_token_from_gh(domain) or
-                cls.__get_token_from_hub(domain))
+        if domain not in _token_for_domain_cached:
+            _token_for_domain_cached[domain] = (cls.__get_token_from_env() or
+                                                cls.__get_token_from_file_in_home_directory(domain) or
+                                                cls.__get_token_from_gh(domain) or
+                                                cls.__get_token_from_hub(domain))
+        return _token_for_domain_cached[domain]
+
+    @staticmethod
+    def flush_cache() -> None:
+        global _token_by_domain_from_file_cached
+        _token_for_domain_cached.clear()
+        _token_by_domain_from_file_cached = None
 
     @classmethod
     def __get_token_from_env(cls) -> Optional["GitHubToken"]:
@@ -91,62 +143,41 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def __get_token_from_file_in_home_directory(cls, domain: str) -> Optional["GitHubToken"]:
+        global _token_by_domain_from_file_cached
         debug("2. Trying to find token in `~/.github-token`...")
-        required_file_name = '.github-token'
         provider = f'auth token for {domain} from `~/.github-token`'
-        file_full_path = os.path.expanduser(f'~/{required_file_name}')
 
-        if os.path.isfile(file_full_path):
-            debug(f"  File `{file_full_path}` exists")
-            with open(file_full_path) as file:
-                # ~/.github-token is a file with a structure similar to:
-                #
-                # ghp_mytoken_for_github_com
-                # ghp_myothertoken_for_git_example_org git.example.org
-                # ghp_yetanothertoken_for_git_example_com git.example.com
-
-                for line in file.readlines():
-                    if line.rstrip().endswith(" " + domain):
-                        token = line.split(" ")[0]
-                        return cls(value=token, provider=provider)
-                    elif domain == GitHubClient.DEFAULT_GITHUB_DOMAIN and " " not in line.rstrip():
-                        return cls(value=line.rstrip(), provider=provider)
+        if _token_by_domain_from_file_cached is None:
+            if not os.path.isfile(_GITHUB_TOKEN_FILE_PATH):
+                return None
+            debug(f"  File `{_GITHUB_TOKEN_FILE_PATH}` exists")
+            with open(_GITHUB_TOKEN_FILE_PATH) as file:
+                # `iter(readline, '')` instead of plain `for line in file` since `mock_open` doesn't support iteration on Python < 3.8.
+                _token_by_domain_from_file_cached = _build_access_token_index(iter(file.readline, ''))
+
+        token = _token_by_domain_from_file_cached.get(domain)
+        if token is not None:
+            return cls(value=token, provider=provider)
         return None
 
     @classmethod
     def __get_token_from_gh(cls, domain: str) -> Optional["GitHubToken"]:
         debug("3. Trying to find token via `gh` GitHub CLI...")
-        # Abort without error if `gh` isn't available
-        gh = shutil.which('gh')
-        if not gh:
-            return None
-
-        gh_version_returncode, gh_version_stdout, _ = popen_cmd(gh, "--version")
-        if gh_version_returncode != 0:
+        # Rather than probing for `gh` executable and its version upfront (which would take 2 extra subprocesses),
+        # let's just try `gh auth token` (available since v2.17.0) and only fall back to `gh auth status` on older versions.
+        try:
+            gh_token_returncode, gh_token_stdout, gh_token_stderr = \
+                popen_cmd("gh", "auth", "token", "--hostname", domain, hide_debug_output=True)
+        except FileNotFoundError:
+            # Abort without error if `gh` isn't available
             return None
 
-        # The stdout of `gh --version` looks like:
-        #
-        # gh version 2.18.0 (2022-10-18)
-        # https://github.com/cli/cli/releases/tag/v2.18.0
-
-        gh_version_match = re.search(r"gh version (\d+).(\d+).(\d+) ", gh_version_stdout)
-        gh_version: Optional[Tuple[int, int, int]] = None
-        if gh_version_match:
-            gh_version = int(gh_version_match.group(1)), int(gh_version_match.group(2)), int(gh_version_match.group(3))
-        else:
-            raise UnexpectedMacheteException(f"Could not parse output of `gh --version`: `{gh_version_stdout}`")
-
-        if gh_version and gh_version >= (2, 17, 0):
-            gh_token_returncode, gh_token_stdout, _ = \
-                popen_cmd(gh, "auth", "token", "--hostname", domain, hide_debug_output=True)
-            if gh_token_returncode != 0:
-                return None
+        if gh_token_returncode == 0:
             if gh_token_stdout:
                 return cls(value=gh_token_stdout.strip(), provider=f'auth token for {domain} from `gh` GitHub CLI')
-        else:
+        elif "unknown command" in gh_token_stderr:
             gh_token_returncode, _, gh_token_stderr = \
-                popen_cmd(gh, "auth", "status", "--hostname", domain, "--show-token", hide_debug_output=True)
+                popen_cmd("gh", "auth", "status", "--hostname", domain, "--show-token", hide_debug_output=True)
             if gh_token_returncode != 0:
                 return None
 
@@ -160,7 +191,7 @@ class GitHubToken(NamedTuple):
             # with non-zero exit code on failure.
             # Note that since v2.31.0 (https://github.com/cli/cli/pull/7540), this output goes to stdout instead.
             # Still, we're only handling here the versions < 2.17.0 that don't provide `gh auth token` yet.
-            match = re.search(r"Token: (\w+)", gh_token_stderr)
+            match = _TOKEN_RE.search(gh_token_stderr)
             if match:
                 return cls(value=match.group(1), provider=f'auth token for {domain} from `gh` GitHub CLI')
         return None
@@ -168,10 +199,8 @@ class GitHubToken(NamedTuple):
     @classmethod
     def __get_token_from_hub(cls, domain: str) -> Optional["GitHubToken"]:
         debug("4. Trying to find token via `hub` GitHub CLI...")
-        home_path: str = str(Path.home())
-        config_hub_path: str = os.path.join(home_path, ".config", "hub")
-        if os.path.isfile(config_hub_path):
-            with open(config_hub_path) as config_hub:
+        if os.path.isfile(_HUB_CONFIG_FILE_PATH):
+            with open(_HUB_CONFIG_FILE_PATH) as config_hub:
                 # ~/.config/hub is a yaml file, with a structure similar to:
                 #
                 # {domain1}:
@@ -184,11 +213,11 @@ class GitHubToken(NamedTuple):
                 #   oauth_token: *******************
                 #   protocol: {protocol}
                 found_host = False
-                for line in config_hub.readlines():
+                for line in iter(config_hub.readline, ''):
                     if line.rstrip() == domain + ":":
                         found_host = True
                     elif found_host and line.lstrip().startswith("oauth_token:"):
-                        result = re.sub(' *oauth_token: +', '', line).rstrip().replace('"', '')
+                        result = _HUB_OAUTH_TOKEN_PREFIX_RE.sub('', line).rstrip().replace('"', '')
                         return cls(value=result,
                                    provider=f'auth token for {domain} from `hub` GitHub CLI')
         return None
@@ -205,12 +234,30 @@ class GitHubClient:
     DEFAULT_GITHUB_DOMAIN = "github.com"
     # As of Dec 2022, GitHub API never returns more than 100 PRs, even if per_page query param is above 100.
     MAX_PULLS_PER_PAGE_COUNT = 100
+    DEFAULT_HEADERS: Dict[str, str] = {
+        'Content-type': 'application/json',
+        'User-Agent': 'git-machete',
+        'Accept': 'application/vnd.github.v3+json'
+    }
 
     def __init__(self, domain: str, organization: str, repository: str) -> None:
         self.__domain: str = domain
         self.__organization: str = organization
         self.__repository: str = repository
-        self.__token: Optional[GitHubToken] = GitHubToken.for_domain(domain)
+        # Common prefix of all repository-scoped API paths, computed once rather than for each request
+        self.__repository_path: str = f'/repos/{organization}/{repository}'
+        # Resolved lazily, since resolving might involve spawning subprocesses and not every client fires an API request
+        self.__token_cached: Optional[GitHubToken] = None
+        self.__is_token_resolved: bool = False
+        # Owned by the client, so that the connections kept alive by the opener are reused across the client's requests
+        self.__opener: Optional["urllib.request.OpenerDirector"] = None
+
+    @property
+    def __token(self) -> Optional[GitHubToken]:
+        if not self.__is_token_resolved:
+            self.__token_cached = GitHubToken.for_domain(self.__domain)
+            self.__is_token_resolved = True
+        return self.__token_cached
 
     @property
     def organization(self) -> str:
@@ -221,11 +268,32 @@ class GitHubClient:
         return self.__repository
 
     def __fire_github_api_request(self, method: str, path: str, request_body: Optional[Dict[str, Any]] = None) -> Any:
-        headers: Dict[str, str] = {
-            'Content-type': 'application/json',
-            'User-Agent': 'git-machete',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        import json
+
+        # Serialized just once, rather than for each page
+        request_body_bytes: Optional[bytes] = json.dumps(request_body).encode() if request_body else None
+        parsed_response_body, next_page_path = self.__fire_github_api_request_for_single_page(
+            method, path, request_body, request_body_bytes)
+        # Pages are accumulated in a loop rather than recursively, so that each page's items are copied just once.
+        while next_page_path:
+            next_page_body, next_page_path = self.__fire_github_api_request_for_single_page(
+                method, next_page_path, request_body, request_body_bytes)
+            parsed_response_body.extend(next_page_body)
+        return parsed_response_body
+
+    def __fire_github_api_request_for_single_page(self, method: str, path: str, request_body: Optional[Dict[str, Any]],
+                                                  request_body_bytes: Optional[bytes]) -> Tuple[Any, Optional[str]]:
+        # These imports are deferred since they're relatively expensive (`ssl`, `email` etc. are imported transitively),
+        # and most git-machete commands never reach out to GitHub API.
+        import http
+        import json
+        import urllib.error
+        # Deliberately NOT using much more convenient `requests` to avoid external dependencies in production code
+        import urllib.request
+
+        from .http_keep_alive import build_keep_alive_opener, open_url
+
+        headers: Dict[str, str] = {**self.DEFAULT_HEADERS}
         if self.__token:
             headers['Authorization'] = 'Bearer ' + self.__token.value
 
@@ -237,29 +305,28 @@ class GitHubClient:
             url_prefix = 'https://' + self.__domain + '/api/v3'
 
         url = url_prefix + path
-        json_body: Optional[str] = json.dumps(request_body) if request_body else None
-        http_request = urllib.request.Request(url, headers=headers, data=json_body.encode() if json_body else None, method=method.upper())
+        http_request = urllib.request.Request(url, headers=headers, data=request_body_bytes, method=method.upper())
         debug(f'firing a {method} request to {url} with {"a" if self.__token else "no"} '
               f'bearer token and request body {compact_dict(request_body) if request_body else "<none>"}')
 
+        if self.__opener is None:
+            self.__opener = build_keep_alive_opener()
         try:
-            with urllib.request.urlopen(http_request) as response:
-                parsed_response_body: Any = json.loads(response.read().decode())
+            with open_url(self.__opener, http_request) as response:
+                parsed_response_body: Any = json.load(response)
                 # https://docs.github.com/en/rest/guides/using-pagination-in-the-rest-api?apiVersion=2022-11-28#using-link-headers
                 link_header: str = response.info()["link"]
                 if link_header:
-                    url_prefix_regex = re.escape(url_prefix)
-                    match = re.search(f'<{url_prefix_regex}(/[^>]+)>; rel="next"', link_header)
-                    if match:
-                        next_page_path = match.group(1)
+                    next_page_path = _get_next_page_path(link_header, url_prefix)
+                    if next_page_path:
                         debug(f'link header is present in the response, and there is more data to retrieve under {next_page_path}')
-                        return parsed_response_body + self.__fire_github_api_request(method, next_page_path, request_body)
+                        return parsed_response_body, next_page_path
                     else:
                         debug('link header is present in the response, but there is no more data to retrieve')
-                return parsed_response_body
+                return parsed_response_body, None
         except urllib.error.HTTPError as err:
             if err.code == http.HTTPStatus.UNPROCESSABLE_ENTITY:
-                error_response = json.loads(err.read().decode())
+                error_response = json.load(err)
                 error_reason: str = self.__extract_failure_info_from_422(error_response)
                 raise UnprocessableEntityHTTPError(error_reason)
             elif err.code in (http.HTTPStatus.UNAUTHORIZED, http.HTTPStatus.FORBIDDEN):
@@ -290,7 +357,7 @@ class GitHubClient:
                 if location is not None:
                     # The URL returned in the `Location` header is of the form "https://api.github.com/repositories/453977473".
                     # It doesn't contain the info about the new org/repo name, which we'd like to display to the user in a warning.
-                    match = re.search('/repositories/([0-9]+)/', location)
+                    match = _REPO_ID_RE.search(location)
                     if match:
                         new_org_and_repo = self.get_org_and_repo_names_by_id(match.group(1))
                     else:
@@ -301,8 +368,9 @@ class GitHubClient:
                         f'GitHub API returned `{err.code}` HTTP status with error message: `{err.reason}`.\n'
                         'It looks like the organization or repository name got changed recently and is outdated.\n'
                         'Update your remote repository manually via: `git remote set-url <remote_name> <new_repository_url>`.')
-                new_path = re.sub("https://[^/]+", "", location)
-                result = self.__fire_github_api_request(method=method, path=new_path, request_body=request_body)
+                new_path = _HOST_STRIP_RE.sub("", location)
+                result = self.__fire_github_api_request_for_single_page(
+                    method=method, path=new_path, request_body=request_body, request_body_bytes=request_body_bytes)
                 warn(f'GitHub API returned `{err.code}` HTTP status with error message: `{err.reason}`.\n'
                      'It looks like the organization or repository name got changed recently and is outdated.\n'
                      f'New organization is {bold(new_org_and_repo.split("/")[0])} and '
@@ -321,13 +389,7 @@ class GitHubClient:
     def __extract_failure_info_from_422(response: Any) -> str:
         if response['message'] != 'Validation Failed':
             return str(response['message'])
-        ret: List[str] = []
-        if response.get('errors'):
-            for error in response['errors']:
-                if error.get('message'):
-                    ret.append(error['message'])
-                else:
-                    ret.append(str(error))
+        ret: List[str] = [error.get('message') or str(error) for error in response.get('errors') or []]
         if ret:
             return '\n'.join(ret)
         else:
@@ -342,7 +404,7 @@ class GitHubClient:
             'draft': draft
         }
         pr = self.__fire_github_api_request(method='POST',
-                                            path=f'/repos/{self.__organization}/{self.__repository}/pulls',
+                                            path=f'{self.__repository_path}/pulls',
                                             request_body=request_body)
         return GitHubPullRequest.from_json(pr)
 
@@ -352,7 +414,7 @@ class GitHubClient:
         }
         # Adding assignees is only available via the Issues API, not PRs API.
         self.__fire_github_api_request(method='POST',
-                                       path=f'/repos/{self.__organization}/{self.__repository}/issues/{number}/assignees',
+                                       path=f'{self.__repository_path}/issues/{number}/assignees',
                                        request_body=request_body)
 
     def add_reviewers_to_pull_request(self, number: int, reviewers: List[str]) -> None:
@@ -360,26 +422,26 @@ class GitHubClient:
             'reviewers': reviewers
         }
         self.__fire_github_api_request(method='POST',
-                                       path=f'/repos/{self.__organization}/{self.__repository}/pulls/{number}/requested_reviewers',
+                                       path=f'{self.__repository_path}/pulls/{number}/requested_reviewers',
                                        request_body=request_body)
 
     def set_base_of_pull_request(self, number: int, base: LocalBranchShortName) -> None:
         request_body: Dict[str, str] = {'base': base}
         self.__fire_github_api_request(method='PATCH',
-                                       path=f'/repos/{self.__organization}/{self.__repository}/pulls/{number}',
+                                       path=f'{self.__repository_path}/pulls/{number}',
                                        request_body=request_body)
 
     def set_description_of_pull_request(self, number: int, description: str) -> None:
         request_body: Dict[str, str] = {'body': description}
         self.__fire_github_api_request(method='PATCH',
-                                       path=f'/repos/{self.__organization}/{self.__repository}/pulls/{number}',
+                                       path=f'{self.__repository_path}/pulls/{number}',
                                        request_body=request_body)
 
     def set_milestone_of_pull_request(self, number: int, milestone: str) -> None:
         request_body: Dict[str, str] = {'milestone': milestone}
         # Setting milestone is only available via the Issues API, not PRs API.
         self.__fire_github_api_request(method='PATCH',
-                                       path=f'/repos/{self.__organization}/{self.__repository}/issues/{number}',
+                                       path=f'{self.__repository_path}/issues/{number}',
                                        request_body=request_body)
 
     # As of September 2023, REST (v3) GitHub API does **not** allow for setting PR draft status,
@@ -429,12 +491,12 @@ class GitHubClient:
         return True
 
     def get_open_pull_requests_by_head(self, head: LocalBranchShortName) -> List[GitHubPullRequest]:
-        path = f'/repos/{self.__organization}/{self.__repository}/pulls?head={self.__organization}:{head}'
+        path = f'{self.__repository_path}/pulls?head={self.__organization}:{head}'
         prs = self.__fire_github_api_request(method='GET', path=path)
         return [GitHubPullRequest.from_json(pr) for pr in prs]
 
     def get_open_pull_requests(self) -> List[GitHubPullRequest]:
-        path = f'/repos/{self.__organization}/{self.__repository}/pulls?per_page={self.MAX_PULLS_PER_PAGE_COUNT}'
+        path = f'{self.__repository_path}/pulls?per_page={self.MAX_PULLS_PER_PAGE_COUNT}'
         prs = self.__fire_github_api_request(method='GET', path=path)
         return list(map(GitHubPullRequest.from_json, prs))
 
@@ -446,7 +508,7 @@ class GitHubClient:
 
     def get_pull_request_by_number_or_none(self, number: int) -> Optional[GitHubPullRequest]:
         try:
-            path = f'/repos/{self.__organization}/{self.__repository}/pulls/{number}'
+            path = f'{self.__repository_path}/pulls/{number}'
             pr_json: Dict[str, Any] = self.__fire_github_api_request(method='GET', path=path)
             return GitHubPullRequest.from_json(pr_json)
         except MacheteException:
@@ -0,0 +1,121 @@
+import http.client
+import select
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict
+
+_IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD'))
+
+
+class DrainingHTTPResponse(http.client.HTTPResponse):
+    __is_begun: bool = False
+
+    def begin(self) -> None:
+        super().begin()
+        self.__is_begun = True
+
+    def close(self) -> None:
+        # Any unread remainder of the body (e.g. of an error response) would otherwise
+        # be mistaken for the beginning of the next response on the same connection.
+        # If the status line and headers couldn't be read in the first place (e.g. the server closed an idle connection),
+        # `HTTPConnection.getresponse` closes the response as well, but then there's no body to drain.
+        if self.__is_begun and not self.isclosed():
+            try:
+                self.read()
+            except (http.client.HTTPException, OSError):
+                pass
+        super().close()
+
+
+class KeepAliveHTTPSHandler(urllib.request.HTTPSHandler):
+    """Unlike the stock `HTTPSHandler` which opens a new connection (and hence does a new TLS handshake) for each request,
+    keeps a single connection per host open and reuses it for the subsequent requests (esp. for paginated responses)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__connection_by_host: Dict[str, http.client.HTTPSConnection] = {}
+        self.__last_response_by_host: Dict[str, http.client.HTTPResponse] = {}
+
+    def https_open(self, req: urllib.request.Request) -> http.client.HTTPResponse:
+        if req.host != urllib.parse.urlsplit(req.full_url).netloc:
+            # The request goes through a proxy, let's leave it to the stock handler.
+            return super().https_open(req)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+
+        connection = self.__connection_by_host.get(req.host)
+        is_reused = connection is not None
+        if connection is None:
+            connection = http.client.HTTPSConnection(req.host, timeout=req.timeout)
+            connection.response_class = DrainingHTTPResponse  # noqa: V101
+            self.__connection_by_host[req.host] = connection
+        last_response = self.__last_response_by_host.pop(req.host, None)
+        if last_response is not None:
+            last_response.close()
+        if is_reused and self.__is_connection_dropped(connection):
+            # Better to find out now than once the request is sent, as not every request can be safely re-sent.
+            connection.close()
+            is_reused = False
+
+        try:
+            response = self.__send(connection, req, headers, is_reused)
+        except OSError as e:
+            self.__discard_connection(req.host)
+            raise urllib.error.URLError(e)
+        except BaseException:
+            # Like in `AbstractHTTPHandler.do_open`, the connection can't be trusted anymore after any failure.
+            # Otherwise, after e.g. `BadStatusLine`, the connection would get stuck in `Request-sent` state,
+            # and each subsequent request to the same host would fail with `CannotSendRequest`.
+            self.__discard_connection(req.host)
+            raise
+
+        self.__last_response_by_host[req.host] = response
+        # Mimic what `AbstractHTTPHandler.do_open` does, as expected by the subsequent urllib response processors.
+        response.url = req.get_full_url()
+        response.msg = response.reason  # type: ignore[assignment]
+        return response
+
+    def __discard_connection(self, host: str) -> None:
+        self.__connection_by_host.pop(host).close()
+        self.__last_response_by_host.pop(host, None)
+
+    @staticmethod
+    def __is_connection_dropped(connection: http.client.HTTPSConnection) -> bool:
+        if connection.sock is None:
+            return False
+        # Nothing is supposed to arrive over an idle connection, other than EOF when the server closes it.
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+        return bool(readable)
+
+    @classmethod
+    def __send(cls, connection: http.client.HTTPSConnection, req: urllib.request.Request, headers: Dict[str, str],
+               is_reused: bool) -> http.client.HTTPResponse:
+        method = req.get_method()
+        try:
+            connection.request(method, req.selector, req.data, headers)
+        except (ConnectionResetError, BrokenPipeError):
+            if not is_reused:
+                raise
+            # The server closed the idle connection before receiving the (complete) request, so it's safe to re-send on a fresh one.
+            connection.close()
+            return cls.__send(connection, req, headers, is_reused=False)
+        try:
+            return connection.getresponse()
+        except ConnectionResetError:  # RemoteDisconnected is a subclass of ConnectionResetError
+            # The server might have either closed the idle connection just as the request was being sent, or processed the request
+            # and then failed to respond. In the latter case, re-sending e.g. `POST .../pulls` could create a duplicate PR.
+            if not is_reused or method not in _IDEMPOTENT_METHODS:
+                raise
+            connection.close()
+            return cls.__send(connection, req, headers, is_reused=False)
+
+
+def build_keep_alive_opener() -> urllib.request.OpenerDirector:
+    return urllib.request.build_opener(KeepAliveHTTPSHandler())
+
+
+def open_url(opener: urllib.request.OpenerDirector, request: urllib.request.Request) -> http.client.HTTPResponse:
+    # Not inlined into the callers, so that the tests have a single place to mock the HTTP traffic away
+    return opener.open(request)  # type: ignore[no-any-return]
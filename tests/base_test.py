@@ -7,6 +7,8 @@ from typing import Any, List, Optional, Set, Tuple
 
 from pytest_mock import MockerFixture
 
+from git_machete.github import GitHubToken
+
 
 class BaseTest:
     def setup_method(self) -> None:
@@ -19,6 +21,7 @@ class BaseTest:
             .add_remote("origin", self.repo_sandbox.remote_path)
         )
         self.expected_mock_methods: Set[str] = set()
+        GitHubToken.flush_cache()
 
     def patch_symbol(self, mocker: MockerFixture, symbol: str, target: Any) -> None:
         if callable(target):
@@ -92,6 +92,10 @@ def mock__popen_cmd_with_fixed_results(*results: Tuple[int, str, str]) -> Callab
     return inner
 
 
+def mock__popen_cmd_raising_file_not_found(cmd: str, *args: Any, **kwargs: Any) -> PopenResult:  # noqa: U100
+    raise FileNotFoundError(f"No such file or directory: '{cmd}'")
+
+
 def mock__run_cmd_and_forward_stdout(cmd: str, *args: str, **kwargs: Any) -> int:
     """Execute command in the new subprocess but capture together process's stdout and print it into sys.stdout.
     This sys.stdout is later being redirected via the `redirect_stdout` in `launch_command()` and gets returned by this function.
@@ -1,12 +1,14 @@
+import functools
 import json
 import re
-from collections import defaultdict
 from contextlib import AbstractContextManager, contextmanager
 from http import HTTPStatus
-from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from types import MappingProxyType
+from typing import (Any, Callable, Dict, Iterator, List, Mapping, NamedTuple,
+                    Optional, Pattern, Tuple, Union)
 from urllib.error import HTTPError
 from urllib.parse import ParseResult, parse_qs, urlencode, urlparse
-from urllib.request import Request
+from urllib.request import OpenerDirector, Request
 
 from git_machete.github import GitHubToken, OrganizationAndRepository
 
@@ -46,11 +48,23 @@ def mock_from_url(domain: str, url: str) -> "OrganizationAndRepository":  # noqa
     return OrganizationAndRepository("example-org", "example-repo")
 
 
-def mock_shutil_which(path: Optional[str]) -> Callable[[Any], Optional[str]]:
-    return lambda _cmd: path
+# `json.dumps` with non-default arguments would construct a new encoder on each call.
+# Compact separators, since nobody is going to read the mocked responses other than the JSON parser.
+_encode_json = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+class _Headers(Dict[str, Any]):
+    # Like `defaultdict(lambda: "", ...)`, but without a default factory to call on each miss
+    __slots__ = ()
+
+    def __missing__(self, _key: str) -> str:
+        return ""
 
 
 class MockGitHubAPIResponse:
+    # Lots of these get created across the test suite, no need for a per-instance __dict__
+    __slots__ = ('status_code', 'response_data', 'headers', '__body', '__info')
+
     def __init__(self,
                  status_code: int,
                  response_data: Union[List[Dict[str, Any]], Dict[str, Any]],
@@ -58,32 +72,43 @@ class MockGitHubAPIResponse:
         self.status_code = status_code
         self.response_data = response_data
         self.headers = headers
+        self.__body: Optional[bytes] = None
+        self.__info: Dict[str, Any] = _Headers(headers)
 
     def read(self) -> bytes:
-        return json.dumps(self.response_data).encode()
+        if self.__body is None:
+            self.__body = _encode_json(self.response_data).encode()
+        return self.__body
 
     def info(self) -> Dict[str, Any]:
-        return defaultdict(lambda: "", self.headers)
+        return self.__info
 
 
 class MockGitHubAPIState:
     def __init__(self, *pulls: Dict[str, Any]) -> None:
-        self.__pulls: List[Dict[str, Any]] = [dict(pull) for pull in pulls]
+        self.__pulls: List[Dict[str, Any]] = []
+        # Side indexes to avoid scanning all pulls on each mocked API call.
+        # Neither PR number nor head can change once a PR is created, unlike e.g. base or state.
+        self.__pull_by_number: Dict[str, Dict[str, Any]] = {}
+        self.__pulls_by_head: Dict[str, List[Dict[str, Any]]] = {}
+        for pull in pulls:
+            self.__append_pull(dict(pull))
+        self.__next_pull_number: int = max((int(pull['number']) for pull in self.__pulls), default=0) + 1
+
+    def __append_pull(self, pull: Dict[str, Any]) -> None:
+        self.__pulls.append(pull)
+        self.__pull_by_number.setdefault(pull['number'], pull)
+        self.__pulls_by_head.setdefault(pull['head']['ref'], []).append(pull)
 
     def get_pull_by_number(self, pull_no: int) -> Optional[Dict[str, Any]]:
-        for pull in self.__pulls:
-            if pull['number'] == str(pull_no):
-                return pull
-        return None
+        return self.__pull_by_number.get(str(pull_no))
 
     def get_open_pulls_by_head(self, head: str) -> List[Dict[str, Any]]:
-        return [pull for pull in self.get_open_pulls() if pull['head']['ref'] == head]
+        return [pull for pull in self.__pulls_by_head.get(head, []) if pull['state'] == 'open']
 
     def get_open_pull_by_head_and_base(self, head: str, base: str) -> Optional[Dict[str, Any]]:
-        for pull in self.get_open_pulls():
-            pull_head: str = pull['head']['ref']
-            pull_base: str = pull['base']['ref']
-            if (head, base) == (pull_head, pull_base):
+        for pull in self.__pulls_by_head.get(head, []):
+            if pull['state'] == 'open' and pull['base']['ref'] == base:
                 return pull
         return None
 
@@ -91,9 +116,9 @@ class MockGitHubAPIState:
         return [pull for pull in self.__pulls if pull['state'] == 'open']
 
     def add_pull(self, pull: Dict[str, Any]) -> None:
-        pull_numbers = [int(item['number']) for item in self.__pulls]
-        pull['number'] = str(max(pull_numbers or [0]) + 1)
-        self.__pulls.append(pull)
+        pull['number'] = str(self.__next_pull_number)
+        self.__next_pull_number += 1
+        self.__append_pull(pull)
 
 
 class MockHTTPError(HTTPError):
@@ -102,177 +127,263 @@ class MockHTTPError(HTTPError):
     def __init__(self, url: str, code: int, msg: Any, hdrs: Message, fp: Any) -> None:
         super().__init__(url, code, msg, hdrs, fp)
         self.msg = msg
+        self.__body: Optional[bytes] = None
 
     def read(self, _n: int = 1) -> bytes:  # noqa: F841
-        return json.dumps(self.msg).encode()
+        if self.__body is None:
+            self.__body = _encode_json(self.msg).encode()
+        return self.__body
+
+
+def _url_path_regex(pattern: str) -> Pattern[str]:
+    return re.compile('^(/api/v3)?' + pattern.replace('*', '[^/]+') + '$')
+
+
+# Compiled once rather than on each mocked request
+_REPOSITORY_PATH = _url_path_regex('/repositories/[0-9]+')
+_PULLS_PATH = _url_path_regex('/repos/*/*/pulls')
+_PULL_PATH = _url_path_regex('/repos/*/*/pulls/[0-9]+')
+_USER_PATH = _url_path_regex('/user')
+_PULL_OR_ISSUE_PATH = _url_path_regex('/repos/*/*/(pulls|issues)/[0-9]+')
+_PULL_OR_ISSUE_BY_REPOSITORY_ID_PATH = _url_path_regex('/repositories/[0-9]+/(pulls|issues)/[0-9]+')
+_PULL_OR_ISSUE_ASSIGNEES_OR_REVIEWERS_PATH = _url_path_regex('/repos/*/*/(pulls|issues)/[0-9]+/(assignees|requested_reviewers)')
+
+# Keys of a PR JSON that point to a ref object rather than a plain value
+_REF_KEYS = frozenset(('base', 'head'))
+
+
+# The same URLs (e.g. of subsequent pages) tend to be requested over and over again across the tests
+@functools.lru_cache(maxsize=256)
+def _parse_url(full_url: str) -> Tuple[ParseResult, Tuple[str, ...], Mapping[str, str]]:
+    parsed_url: ParseResult = urlparse(full_url)
+    url_segments: Tuple[str, ...] = tuple(s for s in parsed_url.path.split('/') if s)
+    # Read-only, since the cached value is shared between the calls
+    query_params: Mapping[str, str] = MappingProxyType({k: v[0] for k, v in parse_qs(parsed_url.query).items()})
+    return parsed_url, url_segments, query_params
 
 
 # Not including [MockGitHubAPIResponse] type argument to maintain compatibility with Python <= 3.8
-def mock_urlopen(github_api_state: MockGitHubAPIState) -> Callable[[Request], AbstractContextManager]:  # type: ignore[type-arg]
+def mock_urlopen(
+        github_api_state: MockGitHubAPIState) -> Callable[[OpenerDirector, Request], AbstractContextManager]:  # type: ignore[type-arg]
     @contextmanager
-    def inner(request: Request) -> Iterator[MockGitHubAPIResponse]:
+    def inner(_opener: OpenerDirector, request: Request) -> Iterator[MockGitHubAPIResponse]:
         yield __mock_urlopen_impl(github_api_state, request)
     return inner
 
 
+class _RequestContext(NamedTuple):
+    state: MockGitHubAPIState
+    method: Optional[str]
+    parsed_url: ParseResult
+    url_segments: Tuple[str, ...]
+    query_params: Mapping[str, str]
+    json_data: Dict[str, Any]
+
+
 def __mock_urlopen_impl(github_api_state: MockGitHubAPIState, request: Request) -> MockGitHubAPIResponse:
-    parsed_url: ParseResult = urlparse(request.full_url)
-    url_segments: List[str] = [s for s in parsed_url.path.split('/') if s]
-    query_params: Dict[str, str] = {k: v[0] for k, v in parse_qs(parsed_url.query).items()}
-    json_data: Dict[str, Any] = request.data and json.loads(request.data)  # type: ignore
+    # No need to parse the URL or the body of a request that is going to be rejected anyway
+    if request.host == "403.example.org":
+        raise HTTPError("http://example.org", 403, 'Forbidden', None, None)  # type: ignore[arg-type]
+
+    parsed_url, url_segments, query_params = _parse_url(request.full_url)
 
-    def handle_method() -> "MockGitHubAPIResponse":
-        if request.method == "GET":
-            return handle_get()
-        elif request.method == "PATCH":
-            return handle_patch()
-        elif request.method == "POST":
-            return handle_post()
+    if request.method != "GET" and url_segments[:3] == ("repos", "example-org", "old-example-repo"):
+        original_path = parsed_url.path
+        new_path = original_path.replace("/repos/example-org/old-example-repo", "/repositories/123456789")
+        location = parsed_url._replace(path=new_path).geturl()
+        raise _redirect_307(parsed_url, location)
+
+    json_data: Dict[str, Any] = request.data and json.loads(request.data)  # type: ignore
+    ctx = _RequestContext(state=github_api_state, method=request.method, parsed_url=parsed_url,
+                          url_segments=url_segments, query_params=query_params, json_data=json_data)
+    return _handle_method(ctx)
+
+
+def _handle_method(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    if ctx.method == "GET":
+        return _handle_get(ctx)
+    elif ctx.method == "PATCH":
+        return _handle_patch(ctx)
+    elif ctx.method == "POST":
+        return _handle_post(ctx)
+    else:
+        return MockGitHubAPIResponse(HTTPStatus.METHOD_NOT_ALLOWED, [])
+
+
+def _url_with_query_params(ctx: _RequestContext, **new_params: Any) -> str:
+    new_query_string: str = urlencode({**ctx.query_params, **new_params})
+    return ctx.parsed_url._replace(query=new_query_string).geturl()
+
+
+def _get_int_query_param(ctx: _RequestContext, key: str, default: int) -> int:
+    value = ctx.query_params.get(key)
+    return int(value) if value else default
+
+
+def _handle_get(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    url_segments = ctx.url_segments
+    if url_segments[:2] == ('api', 'v3'):  # Enterprise domains
+        url_segments = url_segments[2:]
+    # Each GET route is uniquely determined by the first path segment, so let's not try out all the patterns one by one
+    handler = _GET_HANDLERS_BY_FIRST_URL_SEGMENT.get(url_segments[0]) if url_segments else None
+    if handler is None:
+        raise _error_404(ctx)
+    return handler(ctx)
+
+
+def _handle_get_repositories(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    if _REPOSITORY_PATH.match(ctx.parsed_url.path):
+        return MockGitHubAPIResponse(HTTPStatus.OK, {"full_name": "example-org/example-repo"})
+    else:
+        raise _error_404(ctx)
+
+
+def _handle_get_repos(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    path = ctx.parsed_url.path
+    if _PULLS_PATH.match(path):
+        full_head_name: Optional[str] = ctx.query_params.get('head')
+        if full_head_name:
+            head: str = full_head_name.partition(':')[2]
+            prs = ctx.state.get_open_pulls_by_head(head)
+            # If no matching PRs are found, the real GitHub returns 200 OK with an empty JSON array - not 404.
+            return MockGitHubAPIResponse(HTTPStatus.OK, prs)
         else:
-            return MockGitHubAPIResponse(HTTPStatus.METHOD_NOT_ALLOWED, [])
-
-    def url_path_matches(pattern: str) -> bool:
-        regex = pattern.replace('*', '[^/]+')
-        return re.match('^(/api/v3)?' + regex + '$', parsed_url.path) is not None
-
-    def url_with_query_params(**new_params: Any) -> str:
-        new_query_string: str = urlencode({**query_params, **new_params})
-        return parsed_url._replace(query=new_query_string).geturl()
-
-    def handle_get() -> "MockGitHubAPIResponse":
-        if url_path_matches('/repositories/[0-9]+'):
-            return MockGitHubAPIResponse(HTTPStatus.OK, {"full_name": "example-org/example-repo"})
-        elif url_path_matches('/repos/*/*/pulls'):
-            full_head_name: Optional[str] = query_params.get('head')
-            if full_head_name:
-                head: str = full_head_name.split(':')[1]
-                prs = github_api_state.get_open_pulls_by_head(head)
-                # If no matching PRs are found, the real GitHub returns 200 OK with an empty JSON array - not 404.
-                return MockGitHubAPIResponse(HTTPStatus.OK, prs)
-            else:
-                pulls = github_api_state.get_open_pulls()
-                page_str = query_params.get('page')
-                page = int(page_str) if page_str else 1
-                per_page = int(query_params['per_page'])
-                start = (page - 1) * per_page
-                end = page * per_page
-                if end < len(pulls):
-                    headers = {'link': f'<{url_with_query_params(page=page + 1)}>; rel="next"'}
-                elif page == 1:  # we're at the first page, and there are no more pages
-                    headers = {}
-                else:  # we're at the final page, and there were some pages before
-                    headers = {'link': f'<{url_with_query_params(page=1)}>; rel="first"'}
-                return MockGitHubAPIResponse(HTTPStatus.OK, response_data=pulls[start:end], headers=headers)
-        elif url_path_matches('/repos/*/*/pulls/[0-9]+'):
-            pull_no = int(url_segments[-1])
-            pull = github_api_state.get_pull_by_number(pull_no)
-            if pull:
-                return MockGitHubAPIResponse(HTTPStatus.OK, pull)
-            raise error_404()
-        elif url_path_matches('/user'):
-            return MockGitHubAPIResponse(HTTPStatus.OK, {'login': 'github_user', 'type': 'User', 'company': 'VirtusLab'})
+            pulls = ctx.state.get_open_pulls()
+            pulls_count = len(pulls)
+            page = _get_int_query_param(ctx, 'page', default=1)
+            # Same default as in the real GitHub API
+            per_page = _get_int_query_param(ctx, 'per_page', default=30)
+            start = (page - 1) * per_page
+            end = page * per_page
+            if end < pulls_count:
+                headers = {'link': f'<{_url_with_query_params(ctx, page=page + 1)}>; rel="next"'}
+            elif page == 1:  # we're at the first page, and there are no more pages
+                headers = {}
+            else:  # we're at the final page, and there were some pages before
+                headers = {'link': f'<{_url_with_query_params(ctx, page=1)}>; rel="first"'}
+            return MockGitHubAPIResponse(HTTPStatus.OK, response_data=pulls[start:end], headers=headers)
+    elif _PULL_PATH.match(path):
+        pull_no = int(path.rsplit('/', 1)[1])
+        pull = ctx.state.get_pull_by_number(pull_no)
+        if pull:
+            return MockGitHubAPIResponse(HTTPStatus.OK, pull)
+        raise _error_404(ctx)
+    else:
+        raise _error_404(ctx)
+
+
+def _handle_get_user(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    if _USER_PATH.match(ctx.parsed_url.path):
+        return MockGitHubAPIResponse(HTTPStatus.OK, {'login': 'github_user', 'type': 'User', 'company': 'VirtusLab'})
+    else:
+        raise _error_404(ctx)
+
+
+_GET_HANDLERS_BY_FIRST_URL_SEGMENT: Dict[str, Callable[[_RequestContext], MockGitHubAPIResponse]] = {
+    'repositories': _handle_get_repositories,
+    'repos': _handle_get_repos,
+    'user': _handle_get_user,
+}
+
+
+def _handle_patch(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    assert not ctx.query_params
+    path = ctx.parsed_url.path
+    if _PULL_OR_ISSUE_PATH.match(path):
+        return _update_pull_request(ctx)
+    elif _PULL_OR_ISSUE_BY_REPOSITORY_ID_PATH.match(path):
+        return _update_pull_request(ctx)
+    else:
+        raise _error_404(ctx)
+
+
+def _handle_post(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    assert not ctx.query_params
+    path = ctx.parsed_url.path
+    json_data = ctx.json_data
+    if _PULLS_PATH.match(path):
+        head = json_data['head']
+        base = json_data['base']
+        if ctx.state.get_open_pull_by_head_and_base(head, base) is not None:
+            raise _error_422(ctx, {'message': 'Validation Failed', 'errors': [
+                {'message': f'A pull request already exists for test_repo:{head}.'}]})
+        return _create_pull_request(ctx)
+    elif _PULL_OR_ISSUE_ASSIGNEES_OR_REVIEWERS_PATH.match(path):
+        pull_no = int(path.rsplit('/', 2)[1])
+        pull = ctx.state.get_pull_by_number(pull_no)
+        assert pull is not None
+        if "invalid-user" in next(iter(json_data.values())):
+            raise _error_422(
+                ctx,
+                {"message": "Reviews may only be requested from collaborators. "
+                            "One or more of the users or teams you specified is not a collaborator "
+                            "of the example-org/example-repo repository."})
         else:
-            raise error_404()
-
-    def handle_patch() -> "MockGitHubAPIResponse":
-        assert not query_params
-        if url_path_matches("/repos/*/*/(pulls|issues)/[0-9]+"):
-            return update_pull_request()
-        elif url_path_matches("/repositories/[0-9]+/(pulls|issues)/[0-9]+"):
-            return update_pull_request()
+            _fill_pull_request_from_json_data(ctx, pull)
+            return MockGitHubAPIResponse(HTTPStatus.OK, pull)
+    elif path in ("/api/graphql", "/graphql"):  # /api/graphql for Enterprise domains
+        query_or_mutation = json_data['query']
+        if 'query {' in query_or_mutation:
+            match = re.search(r'pullRequest\(number: ([0-9]+)\)', query_or_mutation)
+            assert match is not None
+            pr_number = int(match.group(1))
+            pr = ctx.state.get_pull_by_number(pr_number)
+            assert pr is not None
+            pr_is_draft: bool = pr.get("draft") is True
+            return MockGitHubAPIResponse(HTTPStatus.OK, {
+                # Let's just use PR number as PR GraphQL id, for simplicity
+                'data': {'repository': {'pullRequest': {'id': str(pr_number), 'isDraft': pr_is_draft}}}
+            })
         else:
-            raise error_404()
-
-    def handle_post() -> "MockGitHubAPIResponse":
-        assert not query_params
-        if url_path_matches("/repos/*/*/pulls"):
-            head = json_data['head']
-            base = json_data['base']
-            if github_api_state.get_open_pull_by_head_and_base(head, base) is not None:
-                raise error_422({'message': 'Validation Failed', 'errors': [
-                    {'message': f'A pull request already exists for test_repo:{head}.'}]})
-            return create_pull_request()
-        elif url_path_matches("/repos/*/*/(pulls|issues)/[0-9]+/(assignees|requested_reviewers)"):
-            pull_no = int(url_segments[-2])
-            pull = github_api_state.get_pull_by_number(pull_no)
-            assert pull is not None
-            if "invalid-user" in list(json_data.values())[0]:
-                raise error_422(
-                    {"message": "Reviews may only be requested from collaborators. "
-                                "One or more of the users or teams you specified is not a collaborator "
-                                "of the example-org/example-repo repository."})
-            else:
-                fill_pull_request_from_json_data(pull)
-                return MockGitHubAPIResponse(HTTPStatus.OK, pull)
-        elif parsed_url.path in ("/api/graphql", "/graphql"):  # /api/graphql for Enterprise domains
-            query_or_mutation = json_data['query']
-            if 'query {' in query_or_mutation:
-                match = re.search(r'pullRequest\(number: ([0-9]+)\)', query_or_mutation)
-                assert match is not None
-                pr_number = int(match.group(1))
-                pr = github_api_state.get_pull_by_number(pr_number)
-                assert pr is not None
-                pr_is_draft: bool = pr.get("draft") is True
-                return MockGitHubAPIResponse(HTTPStatus.OK, {
-                    # Let's just use PR number as PR GraphQL id, for simplicity
-                    'data': {'repository': {'pullRequest': {'id': str(pr_number), 'isDraft': pr_is_draft}}}
-                })
-            else:
-                match = re.search(r'([a-zA-Z]+)\(input: \{pullRequestId: "([0-9]+)"}\)', query_or_mutation)
-                assert match is not None
-                target_draft_state = match.group(1) == "convertPullRequestToDraft"
-                pr_number = int(match.group(2))
-                pr = github_api_state.get_pull_by_number(pr_number)
-                assert pr is not None
-                pr['draft'] = target_draft_state
-                return MockGitHubAPIResponse(HTTPStatus.OK, {
-                    'data': {'repository': {'pullRequest': {'id': str(pr_number), 'isDraft': target_draft_state}}}
-                })
+            match = re.search(r'([a-zA-Z]+)\(input: \{pullRequestId: "([0-9]+)"}\)', query_or_mutation)
+            assert match is not None
+            target_draft_state = match.group(1) == "convertPullRequestToDraft"
+            pr_number = int(match.group(2))
+            pr = ctx.state.get_pull_by_number(pr_number)
+            assert pr is not None
+            pr['draft'] = target_draft_state
+            return MockGitHubAPIResponse(HTTPStatus.OK, {
+                'data': {'repository': {'pullRequest': {'id': str(pr_number), 'isDraft': target_draft_state}}}
+            })
+    else:
+        raise _error_404(ctx)
+
+
+def _update_pull_request(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    pull_no = int(ctx.parsed_url.path.rsplit('/', 1)[1])
+    pull = ctx.state.get_pull_by_number(pull_no)
+    assert pull is not None
+    _fill_pull_request_from_json_data(ctx, pull)
+    return MockGitHubAPIResponse(HTTPStatus.OK, pull)
+
+
+def _create_pull_request(ctx: _RequestContext) -> MockGitHubAPIResponse:
+    pull = {'user': {'login': 'some_other_user'},
+            'html_url': 'www.github.com',
+            'body': '# Summary',
+            'state': 'open',
+            'head': {'ref': "", 'repo': {'full_name': 'testing:checkout_prs', 'html_url': 'https:/example.org/pull/1234'}},
+            'base': {'ref': ""}}
+    _fill_pull_request_from_json_data(ctx, pull)
+    ctx.state.add_pull(pull)
+    return MockGitHubAPIResponse(HTTPStatus.CREATED, pull)
+
+
+def _fill_pull_request_from_json_data(ctx: _RequestContext, pull: Dict[str, Any]) -> None:
+    for key, value in ctx.json_data.items():
+        if key in _REF_KEYS:
+            pull[key]['ref'] = value
         else:
-            raise error_404()
+            pull[key] = value
 
-    def update_pull_request() -> "MockGitHubAPIResponse":
-        pull_no = int(url_segments[-1])
-        pull = github_api_state.get_pull_by_number(pull_no)
-        assert pull is not None
-        fill_pull_request_from_json_data(pull)
-        return MockGitHubAPIResponse(HTTPStatus.OK, pull)
-
-    def create_pull_request() -> "MockGitHubAPIResponse":
-        pull = {'user': {'login': 'some_other_user'},
-                'html_url': 'www.github.com',
-                'body': '# Summary',
-                'state': 'open',
-                'head': {'ref': "", 'repo': {'full_name': 'testing:checkout_prs', 'html_url': 'https:/example.org/pull/1234'}},
-                'base': {'ref': ""}}
-        fill_pull_request_from_json_data(pull)
-        github_api_state.add_pull(pull)
-        return MockGitHubAPIResponse(HTTPStatus.CREATED, pull)
-
-    def fill_pull_request_from_json_data(pull: Dict[str, Any]) -> None:
-        for key in json_data.keys():
-            value = json_data[key]
-            if key in ('base', 'head'):
-                pull[key]['ref'] = value
-            else:
-                pull[key] = value
-
-    def redirect_307(location: str) -> HTTPError:
-        return HTTPError(parsed_url.hostname, 307, 'Temporary redirect', {'Location': location}, None)  # type: ignore[arg-type]
-
-    def error_404() -> HTTPError:
-        return HTTPError(parsed_url.hostname, 404, 'Not found', None, None)  # type: ignore[arg-type]
-
-    def error_422(response_data: Any) -> MockHTTPError:
-        return MockHTTPError(parsed_url.hostname, 422, response_data, None, None)  # type: ignore[arg-type]
-
-    if parsed_url.hostname == "403.example.org":
-        raise HTTPError("http://example.org", 403, 'Forbidden', None, None)  # type: ignore[arg-type]
 
-    if request.method != "GET" and url_segments[:3] == ["repos", "example-org", "old-example-repo"]:
-        original_path = parsed_url.path
-        new_path = original_path.replace("/repos/example-org/old-example-repo", "/repositories/123456789")
-        location = parsed_url._replace(path=new_path).geturl()
-        raise redirect_307(location)
+def _redirect_307(parsed_url: ParseResult, location: str) -> HTTPError:
+    return HTTPError(parsed_url.hostname, 307, 'Temporary redirect', {'Location': location}, None)  # type: ignore[arg-type]
+
+
+def _error_404(ctx: _RequestContext) -> HTTPError:
+    return HTTPError(ctx.parsed_url.hostname, 404, 'Not found', None, None)  # type: ignore[arg-type]
+
 
-    return handle_method()
+def _error_422(ctx: _RequestContext, response_data: Any) -> MockHTTPError:
+    return MockHTTPError(ctx.parsed_url.hostname, 422, response_data, None, None)  # type: ignore[arg-type]
@@ -1,23 +1,31 @@
-import itertools
+import os
+import subprocess
+import sys
 from contextlib import contextmanager
 from textwrap import dedent
-from typing import Iterator
+from typing import Iterator, Optional
 from unittest.mock import mock_open
 
+import pytest
 from pytest_mock import MockerFixture
 
 from git_machete.github import (GitHubClient, GitHubToken,
-                                OrganizationAndRepository)
+                                OrganizationAndRepository,
+                                _build_access_token_index, _get_next_page_path)
 from tests.base_test import BaseTest
 from tests.mockers import (assert_failure, assert_success, launch_command,
+                           mock__popen_cmd_raising_file_not_found,
                            mock__popen_cmd_with_fixed_results,
                            mock_input_returning_y, overridden_environment,
                            rewrite_branch_layout_file)
 from tests.mockers_github import (MockGitHubAPIState, mock_from_url,
                                   mock_github_token_for_domain_fake,
                                   mock_github_token_for_domain_none,
-                                  mock_pr_json, mock_shutil_which,
-                                  mock_urlopen)
+                                  mock_pr_json, mock_urlopen)
+
+GITHUB_TOKEN_CONTENTS = ('ghp_mytoken_for_github_com\n'
+                         'ghp_myothertoken_for_git_example_org git.example.org\n'
+                         'ghp_yetanothertoken_for_git_example_com git.example.com')
 
 
 class TestGitHub(BaseTest):
@@ -52,7 +60,8 @@ class TestGitHub(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubClient.MAX_PULLS_PER_PAGE_COUNT', 3)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_github_api_pagination()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
+                          mock_urlopen(self.github_api_state_for_test_github_api_pagination()))
 
         (
             self.repo_sandbox.new_branch("develop")
@@ -80,7 +89,7 @@ class TestGitHub(BaseTest):
     def test_github_enterprise_domain_unauthorized_without_token(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         self.repo_sandbox.set_git_config_key('machete.github.domain', '403.example.org')
 
@@ -95,7 +104,7 @@ class TestGitHub(BaseTest):
     def test_github_enterprise_domain_unauthorized_with_token(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         self.repo_sandbox.set_git_config_key('machete.github.domain', '403.example.org')
 
@@ -115,7 +124,8 @@ class TestGitHub(BaseTest):
     def test_github_enterprise_domain(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_github_enterprise_domain()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
+                          mock_urlopen(self.github_api_state_for_test_github_enterprise_domain()))
 
         github_enterprise_domain = 'git.example.org'
         (
@@ -173,8 +183,9 @@ class TestGitHub(BaseTest):
     def test_github_token_retrieval_order(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'os.path.isfile', lambda _file: False)
-        self.patch_symbol(mocker, 'shutil.which', mock_shutil_which(None))
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_github_enterprise_domain()))
+        self.patch_symbol(mocker, 'git_machete.github.popen_cmd', mock__popen_cmd_raising_file_not_found)
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
+                          mock_urlopen(self.github_api_state_for_test_github_enterprise_domain()))
 
         (
             self.repo_sandbox.new_branch("develop")
@@ -196,10 +207,9 @@ class TestGitHub(BaseTest):
                            "__get_token_from_hub(cls=<class 'git_machete.github.GitHubToken'>, domain=github.com): "
                            "4. Trying to find token via `hub` GitHub CLI..."]
 
-        assert list(itertools.dropwhile(
-            lambda line: '__get_token_from_env' not in line,
-            launch_command('github', 'anno-prs', '--debug').splitlines()
-        ))[:4] == expected_output
+        # Token is only resolved upon the first API request, possibly after a message without a trailing newline has been printed
+        output_lines = launch_command('github', 'anno-prs', '--debug').splitlines()
+        assert [line[line.index('__get_token_from'):] for line in output_lines if '__get_token_from' in line][:4] == expected_output
 
     def test_github_get_token_from_env_var(self) -> None:
         with overridden_environment(GITHUB_TOKEN='github_token_from_env_var'):
@@ -209,85 +219,154 @@ class TestGitHub(BaseTest):
         assert github_token.provider == '`GITHUB_TOKEN` environment variable'
         assert github_token.value == 'github_token_from_env_var'
 
+    def test_github_token_is_cached_per_domain(self) -> None:
+        with overridden_environment(GITHUB_TOKEN='github_token_from_env_var'):
+            GitHubToken.for_domain(domain="github.com")
+        with overridden_environment(GITHUB_TOKEN='another_github_token_from_env_var'):
+            github_token = GitHubToken.for_domain(domain="github.com")
+
+        assert github_token is not None
+        assert github_token.value == 'github_token_from_env_var'
+
     # Note that tox doesn't pass env vars from its env to the processes by default,
     # so we don't need to mock away GITHUB_TOKEN in the following tests, even if it's present in the env.
     # This doesn't cover the case of running from outside tox (e.g. via IntelliJ),
     # so hiding GITHUB_TOKEN might eventually become necessary.
 
-    def test_github_get_token_from_file_in_home_directory(self, mocker: MockerFixture) -> None:
-        github_token_contents = ('ghp_mytoken_for_github_com\n'
-                                 'ghp_myothertoken_for_git_example_org git.example.org\n'
-                                 'ghp_yetanothertoken_for_git_example_com git.example.com')
-        self.patch_symbol(mocker, 'builtins.open', mock_open(read_data=github_token_contents))
-        self.patch_symbol(mocker, 'os.path.isfile', lambda _file: True)
-
-        domain = GitHubClient.DEFAULT_GITHUB_DOMAIN
-        github_token = GitHubToken.for_domain(domain=domain)
-        assert github_token is not None
-        assert github_token.provider == f'auth token for {domain} from `~/.github-token`'
-        assert github_token.value == 'ghp_mytoken_for_github_com'
-
+    @pytest.mark.parametrize('domain,expected_token_value', [
+        (GitHubClient.DEFAULT_GITHUB_DOMAIN, 'ghp_mytoken_for_github_com'),
         # Line ends with \n
-        domain = 'git.example.org'
-        github_token = GitHubToken.for_domain(domain=domain)
-        assert github_token is not None
-        assert github_token.provider == f'auth token for {domain} from `~/.github-token`'
-        assert github_token.value == 'ghp_myothertoken_for_git_example_org'
-
+        ('git.example.org', 'ghp_myothertoken_for_git_example_org'),
         # Last line, doesn't end with \n
-        domain = 'git.example.com'
-        github_token = GitHubToken.for_domain(domain=domain)
-        assert github_token is not None
-        assert github_token.provider == f'auth token for {domain} from `~/.github-token`'
-        assert github_token.value == 'ghp_yetanothertoken_for_git_example_com'
+        ('git.example.com', 'ghp_yetanothertoken_for_git_example_com'),
+        ('git.example.net', None),
+    ])
+    def test_github_get_token_from_file_in_home_directory(
+            self, mocker: MockerFixture, domain: str, expected_token_value: Optional[str]) -> None:
+        self.patch_symbol(mocker, 'builtins.open', mock_open(read_data=GITHUB_TOKEN_CONTENTS))
+        self.patch_symbol(mocker, 'os.path.isfile', lambda _file: True)
 
-        domain = 'git.example.net'
         github_token = GitHubToken.for_domain(domain=domain)
-        assert github_token is None
+        if expected_token_value is None:
+            assert github_token is None
+        else:
+            assert github_token is not None
+            assert github_token.provider == f'auth token for {domain} from `~/.github-token`'
+            assert github_token.value == expected_token_value
+
+    def test_github_token_file_is_read_once_for_multiple_domains(self, mocker: MockerFixture) -> None:
+        open_mock = mock_open(read_data=GITHUB_TOKEN_CONTENTS)
+        self.patch_symbol(mocker, 'builtins.open', open_mock)
+        self.patch_symbol(mocker, 'os.path.isfile', lambda _file: True)
+
+        for domain in (GitHubClient.DEFAULT_GITHUB_DOMAIN, 'git.example.org', 'git.example.com'):
+            assert GitHubToken.for_domain(domain=domain) is not None
+        assert open_mock.call_count == 1
+
+    def test_github_module_import_without_resolvable_home_directory(self) -> None:
+        # E.g. in a container running as an arbitrary uid with no passwd entry and no HOME set
+        script = dedent("""
+            import os, pwd
+
+            def getpwuid(_uid):
+                raise KeyError('getpwuid(): uid not found')
+
+            pwd.getpwuid = getpwuid
+            os.environ.pop('HOME', None)
+            import git_machete.client
+        """)
+        env = {k: v for k, v in os.environ.items() if k != 'HOME'}
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                          env.get('PYTHONPATH')]))
+        result = subprocess.run([sys.executable, '-c', script], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert result.returncode == 0, result.stderr.decode()
+
+    def test_github_build_access_token_index(self) -> None:
+        lines = [
+            'ghp_token_for_github_com github.com\n',
+            # Unqualified line for the default domain, but there's already a qualified line for github.com above
+            'ghp_unqualified_token\n',
+            'ghp_first_token_for_git_example_org git.example.org  \t\n',
+            # Duplicated domain
+            'ghp_second_token_for_git_example_org git.example.org\n',
+            'ghp_token_for_git_example_com git.example.com   ',
+        ]
+        assert _build_access_token_index(lines) == {
+            'github.com': 'ghp_token_for_github_com',
+            'git.example.org': 'ghp_first_token_for_git_example_org',
+            'git.example.com': 'ghp_token_for_git_example_com',
+        }
+
+        assert _build_access_token_index(['ghp_unqualified_token  \n', 'ghp_token_for_github_com github.com\n']) == {
+            'github.com': 'ghp_unqualified_token'
+        }
+
+    def test_github_get_next_page_path(self) -> None:
+        url_prefix = 'https://api.github.com'
+        pulls_url = f'{url_prefix}/repos/example-org/example-repo/pulls'
+        link_header = (f'<{pulls_url}?per_page=3&page=1>; rel="prev", '
+                       f'<{pulls_url}?per_page=3&page=3>; rel="next", '
+                       f'<{pulls_url}?per_page=3&page=5>; rel="last", '
+                       f'<{pulls_url}?per_page=3&page=1>; rel="first"')
+        assert _get_next_page_path(link_header, url_prefix) == '/repos/example-org/example-repo/pulls?per_page=3&page=3'
+
+        # Next page under a different URL prefix
+        assert _get_next_page_path(f'<https://api.example.org/repos/example-org/example-repo/pulls?page=3>; rel="next", '
+                                   f'<{pulls_url}?page=5>; rel="last"', url_prefix) is None
+
+        # Last page
+        assert _get_next_page_path(f'<{pulls_url}?page=4>; rel="prev", <{pulls_url}?page=1>; rel="first"', url_prefix) is None
 
     def test_github_get_token_from_gh(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'os.path.isfile', lambda _file: False)
-        self.patch_symbol(mocker, 'shutil.which', mock_shutil_which('/path/to/gh'))
 
         domain = 'git.example.com'
 
-        fixed_popen_cmd_results = [(1, "unknown error", "")]
+        fixed_popen_cmd_results = [(1, "", "unknown error")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
         github_token = GitHubToken.for_domain(domain=domain)
         assert github_token is None
 
-        fixed_popen_cmd_results = [(0, "gh version 2.0.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.0.0\n", ""),
+        # `gh` < 2.17.0 doesn't support `gh auth token`, so `gh auth status --show-token` is used instead
+        fixed_popen_cmd_results = [(1, "", 'unknown command "token" for "gh auth"'),
                                    (0, "", "You are not logged into any GitHub hosts. Run gh auth login to authenticate.")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
+        GitHubToken.flush_cache()
         github_token = GitHubToken.for_domain(domain=domain)
         assert github_token is None
 
-        fixed_popen_cmd_results = [(0, "gh version 2.16.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.16.0\n", ""),
+        fixed_popen_cmd_results = [(1, "", 'unknown command "token" for "gh auth"'),
                                    (0, "", """github.com
                                                 ✓ Logged in to git.example.com as Foo Bar (/Users/foo_bar/.config/gh/hosts.yml)
                                                 ✓ Git operations for git.example.com configured to use ssh protocol.
                                                 ✓ Token: ghp_mytoken_for_github_com_from_gh_cli
                                                 ✓ Token scopes: gist, read:discussion, read:org, repo, workflow""")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
+        GitHubToken.flush_cache()
         github_token = GitHubToken.for_domain(domain=domain)
         assert github_token is not None
         assert github_token.provider == f'auth token for {domain} from `gh` GitHub CLI'
         assert github_token.value == 'ghp_mytoken_for_github_com_from_gh_cli'
 
-        fixed_popen_cmd_results = [(0, "gh version 2.17.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.17.0\n", ""),
-                                   (0, "", "You are not logged into any GitHub hosts. Run gh auth login to authenticate.")]
+        fixed_popen_cmd_results = [(1, "", "no oauth token found for git.example.com")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
+        GitHubToken.flush_cache()
         github_token = GitHubToken.for_domain(domain=domain)
         assert github_token is None
 
-        fixed_popen_cmd_results = [(0, "gh version 2.17.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.17.0\n", ""),
-                                   (0, "ghp_mytoken_for_github_com_from_gh_cli", "")]
+        fixed_popen_cmd_results = [(0, "ghp_mytoken_for_github_com_from_gh_cli", "")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
+        GitHubToken.flush_cache()
         github_token = GitHubToken.for_domain(domain=domain)
         assert github_token is not None
         assert github_token.provider == f'auth token for {domain} from `gh` GitHub CLI'
         assert github_token.value == 'ghp_mytoken_for_github_com_from_gh_cli'
 
+        self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_raising_file_not_found)
+        GitHubToken.flush_cache()
+        github_token = GitHubToken.for_domain(domain=domain)
+        assert github_token is None
+
     def test_github_get_token_from_hub(self, mocker: MockerFixture) -> None:
         domain0 = 'git.example.net'
         domain1 = GitHubClient.DEFAULT_GITHUB_DOMAIN
@@ -304,12 +383,10 @@ class TestGitHub(BaseTest):
         '''
 
         # Let's pretend that `gh` is available, but fails for whatever reason.
-        self.patch_symbol(mocker, 'shutil.which', mock_shutil_which('/path/to/gh'))
         self.patch_symbol(mocker, 'os.path.isfile', lambda file: '.github-token' not in file)
         self.patch_symbol(mocker, 'builtins.open', mock_open(read_data=dedent(config_hub_contents)))
 
-        fixed_popen_cmd_results = [(0, "gh version 2.31.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.31.0\n", ""),
-                                   (1, "", "unknown error")]
+        fixed_popen_cmd_results = [(1, "", "unknown error")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
         github_token = GitHubToken.for_domain(domain=domain0)
         assert github_token is None
@@ -320,8 +397,6 @@ class TestGitHub(BaseTest):
         assert github_token.provider == f'auth token for {domain1} from `hub` GitHub CLI'
         assert github_token.value == 'ghp_mytoken_for_github_com'
 
-        fixed_popen_cmd_results = [(0, "gh version 2.16.0 (2099-12-31)\nhttps://github.com/cli/cli/releases/tag/v2.16.0\n", ""),
-                                   (1, "", "unknown error")]
         self.patch_symbol(mocker, 'git_machete.utils._popen_cmd', mock__popen_cmd_with_fixed_results(*fixed_popen_cmd_results))
         github_token = GitHubToken.for_domain(domain=domain2)
         assert github_token is not None
@@ -33,7 +33,7 @@ class TestGitHubCheckoutPRs(BaseTest):
     def test_github_checkout_prs(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_checkout_prs()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(self.github_api_state_for_test_checkout_prs()))
 
         (
             self.repo_sandbox.new_branch("root")
@@ -291,7 +291,8 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_freshly_cloned(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_github_checkout_prs_fresh_repo()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
+                          mock_urlopen(self.github_api_state_for_test_github_checkout_prs_fresh_repo()))
 
         (
             self.repo_sandbox.new_branch("root")
@@ -395,7 +396,7 @@ class TestGitHubCheckoutPRs(BaseTest):
     def test_github_checkout_prs_from_fork_with_deleted_repo(self, mocker: MockerFixture) -> None:
         # need to mock fetch_ref due to underlying `git fetch pull/head` calls
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen',
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
                           mock_urlopen(self.github_api_state_for_test_github_checkout_prs_from_fork_with_deleted_repo()))
 
         (
@@ -451,7 +452,7 @@ class TestGitHubCheckoutPRs(BaseTest):
     def test_github_checkout_prs_of_current_user_and_other_users(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
-        self.patch_symbol(mocker, 'urllib.request.urlopen',
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
                           mock_urlopen(self.github_api_state_for_test_github_checkout_prs_of_current_user_and_other_users()))
 
         (
@@ -600,7 +601,7 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_misc_failures_and_warns(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
         assert_success(
@@ -650,7 +651,7 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_forming_a_cycle(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_with_pr_cycle()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(self.github_api_state_with_pr_cycle()))
 
         (
             self.repo_sandbox
@@ -682,7 +683,7 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_remote_already_added(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.git_operations.GitContext.fetch_remote', lambda _self, _remote: None)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(
             self.github_api_state_for_test_github_checkout_prs_single_pr()))
         (
             self.repo_sandbox
@@ -706,7 +707,7 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_org_and_repo_from_config(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.git_operations.GitContext.fetch_remote', lambda _self, _remote: None)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(
             self.github_api_state_for_test_github_checkout_prs_single_pr()))
 
         (
@@ -726,7 +727,7 @@ class TestGitHubCheckoutPRs(BaseTest):
 
     def test_github_checkout_prs_remote_from_config(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.git_operations.GitContext.fetch_remote', lambda _self, _remote: None)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(
             self.github_api_state_for_test_github_checkout_prs_single_pr()))
 
         (
@@ -29,7 +29,7 @@ class TestGitHubCreatePR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.utils.get_current_date', lambda: '2023-12-31')
         github_api_state = self.github_api_state_for_test_create_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("root")
@@ -322,7 +322,7 @@ class TestGitHubCreatePR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_create_pr_for_chain_in_description()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
         self.patch_symbol(mocker, 'git_machete.utils.get_current_date', lambda: '2023-12-31')
 
         (
@@ -404,7 +404,7 @@ class TestGitHubCreatePR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
         github_api_state = self.github_api_state_for_test_create_pr_missing_base_branch_on_remote()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("root")
@@ -459,7 +459,7 @@ class TestGitHubCreatePR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
         self.patch_symbol(mocker, 'git_machete.utils.get_current_date', lambda: '2023-12-31')
         github_api_state = self.github_api_state_for_test_github_create_pr_with_multiple_non_origin_remotes()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         origin_1_remote_path = mkdtemp()
         origin_2_remote_path = mkdtemp()
@@ -731,7 +731,7 @@ class TestGitHubCreatePR(BaseTest):
     def test_github_create_pr_for_no_push_qualifier(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         (
             self.repo_sandbox
@@ -767,7 +767,7 @@ class TestGitHubCreatePR(BaseTest):
     def test_github_create_pr_for_branch_behind_remote(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         (
             self.repo_sandbox
@@ -831,7 +831,7 @@ class TestGitHubCreatePR(BaseTest):
     def test_github_create_pr_for_branch_diverged_from_and_older_than_remote(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_none)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(MockGitHubAPIState()))
 
         (
             self.repo_sandbox
@@ -32,7 +32,7 @@ class TestGitHubRestackPR(BaseTest):
     def test_github_restack_pr_no_prs_or_multiple_prs(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_restack_pr()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(self.github_api_state_for_test_restack_pr()))
 
         self.repo_sandbox.new_branch("develop").commit()
 
@@ -51,7 +51,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -89,7 +89,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -125,7 +125,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         with fixed_author_and_committer_date_in_past():
             (
@@ -168,7 +168,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -210,7 +210,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -245,7 +245,7 @@ class TestGitHubRestackPR(BaseTest):
     def test_github_restack_pr_branch_no_behind(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_restack_pr()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(self.github_api_state_for_test_restack_pr()))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -276,7 +276,7 @@ class TestGitHubRestackPR(BaseTest):
         self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_restack_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
 
         (
             self.repo_sandbox.new_branch("master")
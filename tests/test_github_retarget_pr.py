@@ -25,7 +25,7 @@ class TestGitHubRetargetPR(BaseTest):
         )
 
     def test_github_retarget_pr(self, mocker: MockerFixture) -> None:
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_retarget_pr()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(self.github_api_state_for_test_retarget_pr()))
 
         (
             self.repo_sandbox.new_branch("master")
@@ -113,7 +113,7 @@ class TestGitHubRetargetPR(BaseTest):
         )
 
     def test_github_retarget_pr_explicit_branch(self, mocker: MockerFixture) -> None:
-        self.patch_symbol(mocker, 'urllib.request.urlopen',
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
                           mock_urlopen(self.github_api_state_for_test_github_retarget_pr_explicit_branch()))
 
         branch_first_commit_msg = "First commit on branch."
@@ -190,7 +190,7 @@ class TestGitHubRetargetPR(BaseTest):
     def test_github_retarget_pr_multiple_non_origin_remotes(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
         github_api_state = self.github_api_state_for_test_retarget_pr()
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(github_api_state))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url', mock_urlopen(github_api_state))
         self.patch_symbol(mocker, 'git_machete.utils.get_current_date', lambda: '2023-12-31')
 
         branch_first_commit_msg = "First commit on branch."
@@ -430,7 +430,8 @@ class TestGitHubRetargetPR(BaseTest):
 
     def test_github_retarget_pr_root_branch(self, mocker: MockerFixture) -> None:
         self.patch_symbol(mocker, 'git_machete.github.OrganizationAndRepository.from_url', mock_from_url)
-        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(self.github_api_state_for_test_retarget_pr_root_branch()))
+        self.patch_symbol(mocker, 'git_machete.http_keep_alive.open_url',
+                          mock_urlopen(self.github_api_state_for_test_retarget_pr_root_branch()))
 
         self.repo_sandbox.new_branch("master").commit()
         rewrite_branch_layout_file("master")
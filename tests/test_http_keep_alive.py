@@ -0,0 +1,201 @@
+import http.client
+import http.server
+import io
+import socketserver
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Set, Tuple
+
+import pytest
+from pytest_mock import MockerFixture
+
+from git_machete.http_keep_alive import (DrainingHTTPResponse,
+                                         KeepAliveHTTPSHandler,
+                                         build_keep_alive_opener, open_url)
+from tests.base_test import BaseTest
+
+
+class _FakeSocket:
+    def __init__(self, data: bytes) -> None:
+        self.__data = data
+
+    def makefile(self, _mode: str) -> io.BytesIO:  # noqa: V105
+        return io.BytesIO(self.__data)
+
+
+class _TestServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True  # noqa: V107
+
+    def __init__(self, handler_class: Any) -> None:
+        super().__init__(('127.0.0.1', 0), handler_class)
+        self.connection_count: int = 0
+        self.received_requests: List[Tuple[str, str]] = []
+        # Paths for which the connection is going to be closed (just once) after receiving the request, but before responding
+        self.paths_to_drop_connection_once: Set[str] = set()
+        # Paths for which a malformed status line is going to be sent (just once) in place of a proper response
+        self.paths_to_send_malformed_status_line_once: Set[str] = set()
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    # So that the connections are kept alive
+    protocol_version = 'HTTP/1.1'  # noqa: V107
+    server: _TestServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connection_count += 1
+
+    def do_GET(self) -> None:  # noqa: N802, V105
+        self.__respond()
+
+    def do_POST(self) -> None:  # noqa: N802, V105
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.__respond()
+
+    def __respond(self) -> None:
+        self.server.received_requests.append((self.command, self.path))
+        if self.path in self.server.paths_to_drop_connection_once:
+            self.server.paths_to_drop_connection_once.remove(self.path)
+            self.close_connection = True  # noqa: V101
+            return
+        if self.path in self.server.paths_to_send_malformed_status_line_once:
+            self.server.paths_to_send_malformed_status_line_once.remove(self.path)
+            self.wfile.write(b'garbage\r\n')
+            self.wfile.flush()
+            return
+        status = http.HTTPStatus.NOT_FOUND if self.path.startswith('/missing') else http.HTTPStatus.OK
+        # Large enough not to be consumed along with the headers, so that any unread remainder stays in the socket
+        body = self.path.encode() * 10000
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:  # noqa: U100, V105
+        pass
+
+
+class _QuicklyTimingOutRequestHandler(_RequestHandler):
+    # Closes the connection once it's been idle for that long, like real servers do (after a much longer time, though)
+    timeout = 0.2
+
+
+def _fake_https_connection(host: str, timeout: Optional[float]) -> http.client.HTTPConnection:
+    # TLS is irrelevant to the connection management, so let's talk plain HTTP to the test server
+    return http.client.HTTPConnection(host, timeout=timeout)
+
+
+@contextmanager
+def _running_server(handler_class: Any = _RequestHandler) -> Iterator[_TestServer]:
+    server = _TestServer(handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _get(opener: urllib.request.OpenerDirector, server: _TestServer, path: str) -> bytes:
+    request = urllib.request.Request(f'https://127.0.0.1:{server.server_port}{path}', method='GET')
+    with open_url(opener, request) as response:
+        return response.read()
+
+
+def _post(opener: urllib.request.OpenerDirector, server: _TestServer, path: str) -> bytes:
+    request = urllib.request.Request(f'https://127.0.0.1:{server.server_port}{path}', data=b'{}', method='POST')
+    with open_url(opener, request) as response:
+        return response.read()
+
+
+class TestHttpKeepAlive(BaseTest):
+
+    def test_connection_is_reused_across_ok_and_error_responses(self, mocker: MockerFixture) -> None:
+        self.patch_symbol(mocker, 'http.client.HTTPSConnection', _fake_https_connection)
+        opener = build_keep_alive_opener()
+        with _running_server() as server:
+            assert _get(opener, server, '/first') == b'/first' * 10000
+            with pytest.raises(urllib.error.HTTPError) as e:
+                _get(opener, server, '/missing')
+            assert e.value.code == 404
+            # The body of the error response is left unread, it needs to be drained before the next response can be read
+            assert _get(opener, server, '/second') == b'/second' * 10000
+            with pytest.raises(urllib.error.HTTPError):
+                _get(opener, server, '/missing')
+            assert _get(opener, server, '/third') == b'/third' * 10000
+
+            assert server.connection_count == 1
+
+    def test_connection_dropped_by_server_when_idle(self, mocker: MockerFixture) -> None:
+        self.patch_symbol(mocker, 'http.client.HTTPSConnection', _fake_https_connection)
+        request_spy = mocker.spy(http.client.HTTPConnection, 'request')
+        opener = build_keep_alive_opener()
+        with _running_server(_QuicklyTimingOutRequestHandler) as server:
+            assert _get(opener, server, '/first') == b'/first' * 10000
+            time.sleep(0.5)
+            assert _get(opener, server, '/second') == b'/second' * 10000
+            time.sleep(0.5)
+            assert _post(opener, server, '/third') == b'/third' * 10000
+
+            assert server.connection_count == 3
+            # The dropped connection is detected before anything gets sent over it
+            assert request_spy.call_count == 3
+            assert server.received_requests == [('GET', '/first'), ('GET', '/second'), ('POST', '/third')]
+
+    def test_get_is_retried_when_connection_drops_before_response(self, mocker: MockerFixture) -> None:
+        self.patch_symbol(mocker, 'http.client.HTTPSConnection', _fake_https_connection)
+        opener = build_keep_alive_opener()
+        with _running_server() as server:
+            _get(opener, server, '/first')
+            server.paths_to_drop_connection_once.add('/second')
+            assert _get(opener, server, '/second') == b'/second' * 10000
+
+            assert server.connection_count == 2
+            assert server.received_requests == [('GET', '/first'), ('GET', '/second'), ('GET', '/second')]
+
+    def test_post_is_not_retried_when_connection_drops_before_response(self, mocker: MockerFixture) -> None:
+        self.patch_symbol(mocker, 'http.client.HTTPSConnection', _fake_https_connection)
+        opener = build_keep_alive_opener()
+        with _running_server() as server:
+            _get(opener, server, '/first')
+            server.paths_to_drop_connection_once.add('/pulls')
+            # The server might have already e.g. created a PR, so re-sending the request could lead to a duplicate
+            with pytest.raises(urllib.error.URLError):
+                _post(opener, server, '/pulls')
+            # ...but the subsequent requests are still fine
+            assert _get(opener, server, '/second') == b'/second' * 10000
+
+            assert server.received_requests == [('GET', '/first'), ('POST', '/pulls'), ('GET', '/second')]
+
+    def test_connection_is_discarded_after_malformed_response(self, mocker: MockerFixture) -> None:
+        self.patch_symbol(mocker, 'http.client.HTTPSConnection', _fake_https_connection)
+        opener = build_keep_alive_opener()
+        with _running_server() as server:
+            _get(opener, server, '/first')
+            server.paths_to_send_malformed_status_line_once.add('/second')
+            with pytest.raises(http.client.BadStatusLine):
+                _get(opener, server, '/second')
+            assert _get(opener, server, '/third') == b'/third' * 10000
+            assert _get(opener, server, '/fourth') == b'/fourth' * 10000
+
+            assert server.connection_count == 2
+
+    def test_proxied_request_falls_through_to_stock_handler(self, mocker: MockerFixture) -> None:
+        stock_handler_response = object()
+        self.patch_symbol(mocker, 'urllib.request.HTTPSHandler.https_open', lambda _self, _req: stock_handler_response)
+        request = urllib.request.Request('https://api.github.com/user')
+        request.set_proxy('proxy.example.org:3128', 'https')
+
+        assert KeepAliveHTTPSHandler().https_open(request) is stock_handler_response
+
+    def test_draining_response_closes_cleanly_when_status_line_could_not_be_read(self) -> None:
+        # This is what happens when the server has closed an idle keep-alive connection:
+        # `HTTPConnection.getresponse` closes the response after `begin` fails.
+        response = DrainingHTTPResponse(_FakeSocket(b''))  # type: ignore[arg-type]
+        with pytest.raises(http.client.RemoteDisconnected):
+            response.begin()
+        response.close()
+        assert response.isclosed()